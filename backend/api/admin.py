@@ -1,4 +1,5 @@
 from django.contrib import admin
-from .models import Expense
+from .models import Expense, Profile
 
 admin.site.register(Expense)
+admin.site.register(Profile)
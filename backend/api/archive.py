@@ -0,0 +1,151 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from . import views
+from .models import (
+    ArchivedExpense,
+    ArchivedSplit,
+    BalanceSnapshot,
+    Expense,
+    Split,
+)
+
+HOT_TABLES = ("api_expense", "api_split")
+
+
+def archive_batch(cutoff, batch_size: int = 500) -> int:
+    """
+    Move up to batch_size expenses dated before cutoff (and their splits) into
+    the archive tables and fold what they owed into BalanceSnapshot, all in
+    one transaction. Returns how many expenses were moved.
+    """
+    with transaction.atomic():
+        expenses = list(
+            Expense.objects.filter(date__lt=cutoff)
+            .order_by("id")
+            .values("id", "description", "amount", "currency", "base_rate", "paid_by_id", "date")[:batch_size]
+        )
+        if not expenses:
+            return 0
+
+        ids = [e["id"] for e in expenses]
+        splits = list(
+            Split.objects.filter(expense_id__in=ids).values_list("expense_id", "user_id", "amount")
+        )
+
+        ArchivedExpense.objects.bulk_create([ArchivedExpense(**e) for e in expenses])
+        ArchivedSplit.objects.bulk_create([
+            ArchivedSplit(expense_id=eid, user_id=uid, amount=amt) for eid, uid, amt in splits
+        ])
+        _carry_forward(expenses, splits)
+
+        Split.objects.filter(expense_id__in=ids).delete()
+        Expense.objects.filter(pk__in=ids).delete()
+        return len(ids)
+
+
+def _carry_forward(expenses, splits):
+    """
+    Fold archived expenses into (creditor, debtor, currency, month)
+    snapshots, both as is and valued in the base currency at each expense's
+    base_rate. Every split owed to someone else goes to (payer, ower), and
+    every expense's full amount to (payer, payer), which is what summary
+    falls back to for users without splits. expenses are the dicts
+    archive_batch moved; splits are (expense id, user id, amount).
+    """
+    by_id = {e["id"]: e for e in expenses}
+    deltas: dict[tuple, list] = {}
+
+    def add(creditor, debtor, expense, amount):
+        key = (creditor, debtor, expense["currency"], expense["date"].replace(day=1))
+        delta = deltas.setdefault(key, [Decimal("0"), Decimal("0")])
+        delta[0] += Decimal(amount)
+        delta[1] += Decimal(amount) * expense["base_rate"]
+
+    for e in expenses:
+        add(e["paid_by_id"], e["paid_by_id"], e, e["amount"])
+    for eid, uid, amt in splits:
+        payer = by_id[eid]["paid_by_id"]
+        if payer != uid:
+            add(payer, uid, by_id[eid], amt)
+
+    existing = {
+        (s.creditor_id, s.debtor_id, s.currency, s.date): s
+        for s in BalanceSnapshot.objects.select_for_update().filter(
+            creditor_id__in={k[0] for k in deltas},
+            debtor_id__in={k[1] for k in deltas},
+            date__gte=min(k[3] for k in deltas),
+            date__lte=max(k[3] for k in deltas),
+        )
+    }
+    now = timezone.now()
+    to_update, to_create = [], []
+    for key, (amt, base_amt) in deltas.items():
+        snap = existing.get(key)
+        if snap is None:
+            creditor, debtor, currency, day = key
+            to_create.append(BalanceSnapshot(
+                creditor_id=creditor, debtor_id=debtor, currency=currency, date=day,
+                amount=amt, base_amount=base_amt,
+            ))
+        else:
+            snap.amount += amt
+            snap.base_amount += base_amt
+            snap.updated_at = now
+            to_update.append(snap)
+    BalanceSnapshot.objects.bulk_update(to_update, ["amount", "base_amount", "updated_at"])
+    BalanceSnapshot.objects.bulk_create(to_create)
+
+
+def hot_table_stats(user=None, repeat: int = 5) -> dict:
+    """
+    Row counts and on-disk bytes (when SQLite's dbstat is available) for the
+    hot tables, plus the median time of the summary and balances endpoints
+    for user (by default whoever has the most live splits), so the same
+    user's reads can be compared before and after archiving.
+    """
+    stats = {}
+    with connection.cursor() as c:
+        for table in HOT_TABLES:
+            c.execute(f"SELECT COUNT(*) FROM {table}")
+            stats[f"{table}_rows"] = c.fetchone()[0]
+            try:
+                c.execute("SELECT COALESCE(SUM(pgsize), 0) FROM dbstat WHERE name = %s", [table])
+                stats[f"{table}_bytes"] = c.fetchone()[0]
+            except DatabaseError:
+                stats[f"{table}_bytes"] = None
+
+    user = user or sample_user()
+    factory = APIRequestFactory()
+    for name in ("summary", "balances"):
+        if user is None:
+            stats[f"{name}_ms"] = None
+            continue
+        samples = []
+        for _ in range(repeat):
+            request = factory.get(f"/api/{name}/")
+            force_authenticate(request, user=user)
+            start = time.perf_counter()
+            getattr(views, name)(request)
+            samples.append((time.perf_counter() - start) * 1000)
+        stats[f"{name}_ms"] = round(statistics.median(samples), 2)
+    return stats
+
+
+def sample_user():
+    """The user with the most live splits, or None if there are none."""
+    uid = (
+        Split.objects.values("user_id")
+        .annotate(n=Count("id"))
+        .order_by("-n")
+        .values_list("user_id", flat=True)
+        .first()
+    )
+    return get_user_model().objects.filter(pk=uid).first() if uid else None
@@ -0,0 +1,170 @@
+import bisect
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import ExchangeRate, Expense, base_currency
+
+CURRENCY_RE = re.compile(r"^[A-Z]{3}$")
+
+
+class FxError(ValueError):
+    """Raised when an amount can't be converted (bad code or missing rate)."""
+
+
+def normalize_currency(code) -> str:
+    code = (code or "").strip().upper()
+    if not CURRENCY_RE.match(code):
+        raise FxError(f"invalid currency code: {code!r}")
+    return code
+
+
+class RateCache:
+    """
+    LRU cache of (currency, date) -> rate to the base currency. Entries expire
+    after `ttl` seconds so rates loaded by another process are picked up.
+    """
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys) -> dict:
+        """Like get() for each key, under one lock acquisition. Misses are omitted."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                hit = self._data.get(key)
+                if hit is None:
+                    continue
+                rate, stored_at = hit
+                if now - stored_at > self.ttl:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = rate
+        return found
+
+    def put(self, key, rate):
+        with self._lock:
+            self._data[key] = (rate, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+rate_cache = RateCache(
+    maxsize=getattr(settings, "FX_RATE_CACHE_SIZE", 4096),
+    ttl=getattr(settings, "FX_RATE_CACHE_TTL", 3600),
+)
+
+
+def rates_for(buckets) -> dict:
+    """
+    Rate to the base currency for every (currency, date) in buckets, using the
+    latest ExchangeRate effective on or before that date. Cache misses are
+    resolved together with a single query.
+    """
+    base = base_currency()
+    rates, wanted = {}, []
+    for key in buckets:
+        if key[0] == base:
+            rates[key] = Decimal("1")
+        else:
+            wanted.append(key)
+    rates.update(rate_cache.get_many(wanted))
+    missing = {key for key in wanted if key not in rates}
+    if not missing:
+        return rates
+
+    history = defaultdict(list)  # currency -> [(effective_date, rate), ...] ascending
+    for currency, effective_date, rate in (
+        ExchangeRate.objects.filter(
+            currency__in={c for c, _ in missing},
+            effective_date__lte=max(d for _, d in missing),
+        )
+        .order_by("currency", "effective_date")
+        .values_list("currency", "effective_date", "rate")
+    ):
+        history[currency].append((effective_date, rate))
+
+    for currency, day in missing:
+        series = history.get(currency, [])
+        i = bisect.bisect_right(series, (day, Decimal("Infinity")))
+        if i == 0:
+            raise FxError(f"no {currency} exchange rate on or before {day}")
+        rates[(currency, day)] = series[i - 1][1]
+        rate_cache.put((currency, day), series[i - 1][1])
+    return rates
+
+
+def reprice_expenses(currencies=None, since=None) -> int:
+    """
+    Re-derive Expense.base_rate from ExchangeRate in one UPDATE, for
+    expenses in `currencies` (default: every non-base currency) dated on or
+    after `since`. An expense with no rate on or before its date keeps the
+    one it has. Returns how many expenses were updated.
+    """
+    latest = (
+        ExchangeRate.objects.filter(currency=OuterRef("currency"), effective_date__lte=OuterRef("date"))
+        .order_by("-effective_date")
+        .values("rate")[:1]
+    )
+    expenses = Expense.objects.exclude(currency=base_currency())
+    if currencies is not None:
+        expenses = expenses.filter(currency__in=currencies)
+    if since is not None:
+        expenses = expenses.filter(date__gte=since)
+    return expenses.update(base_rate=Coalesce(Subquery(latest), F("base_rate")))
+
+
+def convert_totals(rows, target: str) -> dict:
+    """
+    rows: iterable of (key, amount, currency, date). Returns {key: Decimal}.
+
+    Amounts already in target are added as they are. Every other amount is
+    valued in the base currency at the rate in effect on its own date, with
+    one lookup per (currency, date) bucket. Each key's base total is then
+    converted into target once, at target's rate today. Balance reads pass
+    amounts already valued in the base currency (splits summed with
+    Expense.base_rate, BalanceSnapshot.base_amount), so the only lookup they
+    need is target's rate today.
+    """
+    totals = defaultdict(Decimal)
+    buckets = defaultdict(Decimal)
+    for key, amount, currency, day in rows:
+        if currency == target:
+            totals[key] += Decimal(amount)
+        else:
+            buckets[(key, currency, day)] += Decimal(amount)
+    if not buckets:
+        return totals
+
+    today = date.today()
+    rates = rates_for({(currency, day) for _, currency, day in buckets} | {(target, today)})
+    in_base = defaultdict(Decimal)
+    for (key, currency, day), amount in buckets.items():
+        in_base[key] += amount * rates[(currency, day)]
+    for key, amount in in_base.items():
+        totals[key] += amount / rates[(target, today)]
+    return totals
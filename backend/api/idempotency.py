@@ -0,0 +1,104 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def key_ttl() -> timedelta:
+    return getattr(settings, "IDEMPOTENCY_KEY_TTL", timedelta(hours=24))
+
+
+def request_fingerprint(request) -> str:
+    """Hash of what the client asked for, so a reused key with a new body is caught."""
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    raw = f"{request.method} {request.path}\n{body}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _replay(record, fingerprint):
+    if record.request_hash != fingerprint:
+        return Response(
+            {"error": f"{HEADER} was already used for a different request"}, status=422
+        )
+    response = Response(record.response_body, status=record.response_status)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    """
+    Make a POST view safe to retry with an Idempotency-Key header.
+
+    Must sit under @api_view so request.user is resolved. The key row is
+    inserted in the same transaction as the view's own writes, so a concurrent
+    duplicate blocks on the unique (user, key) constraint until the first
+    request commits, then replays its stored response. Other connections
+    never see a key before its response is stored, so there is no
+    "in progress" state to report. 5xx responses roll back the whole
+    transaction and leave the key free to retry.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if request.method != "POST" or not key:
+            return view(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"error": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters"}, status=400
+            )
+
+        fingerprint = request_fingerprint(request)
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, request_hash=fingerprint
+                    )
+            except IntegrityError:
+                record = IdempotencyKey.objects.get(user=request.user, key=key)
+                if record.created_at >= timezone.now() - key_ttl():
+                    return _replay(record, fingerprint)
+                # Expired but not purged yet: take the key over for this request.
+                record.request_hash = fingerprint
+                record.response_status = None
+                record.response_body = None
+                record.created_at = timezone.now()
+                record.save()
+
+            response = view(request, *args, **kwargs)
+            if response.status_code >= 500:
+                transaction.set_rollback(True)
+                return response
+
+            record.response_status = response.status_code
+            record.response_body = response.data
+            record.save(update_fields=["response_status", "response_body"])
+            return response
+
+    return wrapper
+
+
+def purge_expired(batch_size: int = 5000, now=None) -> int:
+    """Delete expired keys in primary-key batches; returns how many were removed."""
+    cutoff = (now or timezone.now()) - key_ttl()
+    removed = 0
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(created_at__lt=cutoff)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import math
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.core.signals import got_request_exception
+from django.db import OperationalError
+
+# Default traffic mix, by weight. "dashboard" fans out the three reads the
+# Dashboard page makes in parallel.
+DEFAULT_MIX = {
+    "dashboard": 60,
+    "create_expense": 15,
+    "add_friend": 10,
+    "create_group": 10,
+    "login": 5,
+}
+
+
+def parse_mix(spec: str | None) -> dict[str, int]:
+    """'dashboard=6,login=1' -> {"dashboard": 6, "login": 1}."""
+    if not spec:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        try:
+            mix[name] = int(weight)
+        except ValueError:
+            raise ValueError(f"weight for {name!r} must be an integer")
+    if sum(mix.values()) <= 0:
+        raise ValueError("mix weights must add up to more than zero")
+    return mix
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0 for an empty list."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    k = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[k]
+
+
+class AsgiClient:
+    """Minimal in-process HTTP client that calls an ASGI app directly."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, body=None, token: str | None = None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        headers = [
+            (b"host", b"localhost"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ]
+        if token:
+            headers.append((b"authorization", f"Bearer {token}".encode()))
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": b"",
+            "root_path": "",
+            "headers": headers,
+            "client": ("127.0.0.1", 0),
+            "server": ("localhost", 80),
+        }
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": payload, "more_body": False}
+            # Never disconnect; Django cancels this wait once it has responded.
+            await asyncio.Event().wait()
+
+        status = 0
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await self.app(scope, receive, send)
+        return status
+
+
+class Stats:
+    """Per-request samples, bucketed for interval reports and the final summary."""
+
+    def __init__(self):
+        self.samples: list[tuple[float, str, float, int]] = []
+        self.locks = 0
+        self._lock = threading.Lock()
+
+    def record(self, route: str, latency_ms: float, status: int):
+        self.samples.append((time.perf_counter(), route, latency_ms, status))
+
+    def on_exception(self, **kwargs):
+        # got_request_exception fires inside Django's except block, on the
+        # thread that ran the view.
+        exc = sys.exc_info()[1]
+        if isinstance(exc, OperationalError) and "locked" in str(exc):
+            with self._lock:
+                self.locks += 1
+
+    @staticmethod
+    def summarize(samples, seconds: float) -> dict:
+        latencies = [s[2] for s in samples]
+        statuses = Counter(s[3] // 100 for s in samples)
+        return {
+            "requests": len(samples),
+            "rps": len(samples) / seconds if seconds else 0.0,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=0.0),
+            "4xx": statuses[4],
+            "5xx": statuses[5],
+        }
+
+
+class LoadContext:
+    def __init__(self, client, stats, users, password, rng, tag):
+        self.client = client
+        self.stats = stats
+        self.users = users  # [(id, username, email, token), ...]
+        self.password = password
+        self.rng = rng
+        self.tag = tag
+
+    async def call(self, route, method, path, body=None, token=None):
+        start = time.perf_counter()
+        status = await self.client.request(method, path, body, token)
+        self.stats.record(route, (time.perf_counter() - start) * 1000, status)
+        return status
+
+
+async def _dashboard(ctx, user):
+    token = user[3]
+    await asyncio.gather(
+        ctx.call("summary", "GET", "/api/summary/", token=token),
+        ctx.call("recent-expenses", "GET", "/api/recent-expenses/", token=token),
+        ctx.call("balances", "GET", "/api/balances/", token=token),
+    )
+
+
+async def _create_expense(ctx, user):
+    others = ctx.rng.sample(ctx.users, min(len(ctx.users), ctx.rng.randint(1, 4)))
+    participants = {user[0]} | {u[0] for u in others}
+    await ctx.call("expenses", "POST", "/api/expenses/", {
+        "description": f"{ctx.tag} expense",
+        "amount": f"{ctx.rng.randint(100, 50000) / 100:.2f}",
+        "split_type": "equal",
+        "splits": [{"user_id": uid} for uid in participants],
+    }, token=user[3])
+
+
+async def _add_friend(ctx, user):
+    other = ctx.rng.choice(ctx.users)
+    await ctx.call("add-friend", "POST", "/api/friends/add/", {"email": other[2]}, token=user[3])
+
+
+async def _create_group(ctx, user):
+    members = ctx.rng.sample(ctx.users, min(len(ctx.users), ctx.rng.randint(1, 6)))
+    await ctx.call("create-group", "POST", "/api/groups/create/", {
+        "name": f"{ctx.tag} group",
+        "member_ids": [u[0] for u in members],
+    }, token=user[3])
+
+
+async def _login(ctx, user):
+    await ctx.call("login", "POST", "/api/auth/login/", {
+        "username": ctx.rng.choice([user[1], user[2]]),
+        "password": ctx.password,
+    })
+
+
+SCENARIOS = {
+    "dashboard": _dashboard,
+    "create_expense": _create_expense,
+    "add_friend": _add_friend,
+    "create_group": _create_group,
+    "login": _login,
+}
+
+
+async def run_load(app, users, password, mix, concurrency, duration, interval, tag, seed=None, report=print):
+    """
+    Drive `app` with `concurrency` virtual users for `duration` seconds, calling
+    report() with a line every `interval` seconds. Returns (stats, elapsed).
+    """
+    stats = Stats()
+    rng = random.Random(seed)
+    ctx = LoadContext(AsgiClient(app), stats, users, password, rng, tag)
+    names, weights = list(mix), list(mix.values())
+    started = time.perf_counter()
+    deadline = started + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            scenario = SCENARIOS[rng.choices(names, weights)[0]]
+            await scenario(ctx, rng.choice(users))
+
+    async def reporter():
+        seen, locks_seen = 0, 0
+        while True:
+            await asyncio.sleep(interval)
+            window = stats.samples[seen:]
+            seen += len(window)
+            s = Stats.summarize(window, interval)
+            report(
+                f"t={time.perf_counter() - started:6.1f}s  reqs={s['requests']:6d}  "
+                f"rps={s['rps']:8.1f}  p50={s['p50']:7.1f}ms  p95={s['p95']:7.1f}ms  "
+                f"p99={s['p99']:7.1f}ms  4xx={s['4xx']}  5xx={s['5xx']}  "
+                f"locked={stats.locks - locks_seen}"
+            )
+            locks_seen = stats.locks
+
+    got_request_exception.connect(stats.on_exception)
+    reporter_task = asyncio.create_task(reporter())
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        reporter_task.cancel()
+        got_request_exception.disconnect(stats.on_exception)
+    return stats, time.perf_counter() - started
+
+
+def route_table(stats: Stats, elapsed: float) -> list[str]:
+    by_route = defaultdict(list)
+    for sample in stats.samples:
+        by_route[sample[1]].append(sample)
+    lines = [
+        f"{'route':<16}{'reqs':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'4xx':>6}{'5xx':>6}"
+    ]
+    rows = sorted(by_route.items()) + [("TOTAL", stats.samples)]
+    for route, samples in rows:
+        s = Stats.summarize(samples, elapsed)
+        lines.append(
+            f"{route:<16}{s['requests']:>8}{s['rps']:>9.1f}{s['p50']:>9.1f}{s['p95']:>9.1f}"
+            f"{s['p99']:>9.1f}{s['max']:>9.1f}{s['4xx']:>6}{s['5xx']:>6}"
+        )
+    return lines
@@ -0,0 +1,47 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.archive import archive_batch, hot_table_stats, sample_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Move expenses older than a cutoff into the archive tables, in batches, "
+        "leaving BalanceSnapshot rows so balances don't change."
+    )
+
+    def add_arguments(self, parser):
+        cutoff = parser.add_mutually_exclusive_group(required=True)
+        cutoff.add_argument("--before", help="Archive expenses dated before YYYY-MM-DD.")
+        cutoff.add_argument("--older-than-days", type=int)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--max-batches", type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options["before"]:
+            try:
+                cutoff = date.fromisoformat(options["before"])
+            except ValueError:
+                raise CommandError("--before must be YYYY-MM-DD")
+        else:
+            cutoff = date.today() - timedelta(days=options["older_than_days"])
+
+        user = sample_user()
+        before = hot_table_stats(user)
+        moved, batches = 0, 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            n = archive_batch(cutoff, batch_size=options["batch_size"])
+            if not n:
+                break
+            moved += n
+            batches += 1
+            self.stdout.write(f"  batch {batches}: archived {n} expenses")
+        after = hot_table_stats(user)
+
+        self.stdout.write(f"Archived {moved} expenses dated before {cutoff}.")
+        if user is not None:
+            self.stdout.write(f"Endpoint timings are for {user.username}.")
+        self.stdout.write(f"{'':<20}{'before':>14}{'after':>14}")
+        for key in before:
+            self.stdout.write(f"{key:<20}{before[key]!s:>14}{after[key]!s:>14}")
@@ -0,0 +1,113 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import views
+from api.fx import base_currency, rate_cache, reprice_expenses
+from api.models import ExchangeRate, Expense, Split
+
+CURRENCIES = ["EUR", "GBP", "JPY", "INR", "CAD"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a multi-currency ledger inside a transaction, time summary and balances "
+        "with and without conversion, then roll everything back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--expenses", type=int, default=5000)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--friends", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        with transaction.atomic():
+            me = self._seed(rng, opts)
+            self.stdout.write(
+                f"{opts['expenses']} expenses over {opts['days']} days in "
+                f"{len(CURRENCIES) + 1} currencies"
+            )
+            base = base_currency()
+            runs = [
+                (f"into {base}, warm cache", base, False),
+                ("into EUR, cold cache", "EUR", True),
+                ("into EUR, warm cache", "EUR", False),
+            ]
+            timings = {
+                (name, label): self._p50(me, name, currency, opts["repeat"], cold)
+                for name in ("summary", "balances")
+                for label, currency, cold in runs
+            }
+
+            # Baseline: the same ledger with nothing to convert.
+            Expense.objects.filter(splits__user=me).update(currency=base, base_rate=1)
+            baseline = {
+                name: self._p50(me, name, base, opts["repeat"]) for name in ("summary", "balances")
+            }
+            transaction.set_rollback(True)
+
+        for name in ("summary", "balances"):
+            self.stdout.write(f"  {name + ', single-currency ' + base:<36} p50 {baseline[name]:8.2f} ms")
+            for label, _, _ in runs:
+                p50 = timings[(name, label)]
+                self.stdout.write(
+                    f"  {name + ', ' + label:<36} p50 {p50:8.2f} ms  "
+                    f"({p50 - baseline[name]:+.2f} ms for conversion)"
+                )
+
+    def _p50(self, me, name, currency, repeat, cold=False):
+        view = getattr(views, name)
+        factory = APIRequestFactory()
+        samples = []
+        for _ in range(repeat):
+            if cold:
+                rate_cache.clear()
+            request = factory.get(f"/api/{name}/", {"currency": currency})
+            force_authenticate(request, user=me)
+            start = time.perf_counter()
+            view(request)
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def _seed(self, rng, opts):
+        prefix = f"benchfx{rng.randrange(10**9)}-"
+        User.objects.bulk_create([User(username=f"{prefix}{i}") for i in range(opts["friends"] + 1)])
+        users = list(User.objects.filter(username__startswith=prefix).order_by("id"))
+        me, friends = users[0], users[1:]
+
+        start = date.today() - timedelta(days=opts["days"])
+        ExchangeRate.objects.bulk_create([
+            ExchangeRate(currency=c, effective_date=start + timedelta(days=d),
+                         rate=Decimal(str(round(rng.uniform(0.005, 1.5), 6))))
+            for c in CURRENCIES for d in range(opts["days"] + 1)
+        ], batch_size=1000)
+
+        currencies = CURRENCIES + [base_currency()]
+        expenses = Expense.objects.bulk_create([
+            Expense(description="bench", amount=Decimal("30.00"),
+                    currency=rng.choice(currencies),
+                    paid_by=rng.choice([me, rng.choice(friends)]))
+            for _ in range(opts["expenses"])
+        ], batch_size=1000)
+        for exp in expenses:
+            exp.date = start + timedelta(days=rng.randrange(opts["days"] + 1))
+        Expense.objects.bulk_update(expenses, ["date"], batch_size=1000)
+        reprice_expenses()
+
+        splits = []
+        for exp in expenses:
+            other = rng.choice(friends) if exp.paid_by_id == me.id else me
+            splits.append(Split(expense=exp, user=exp.paid_by, amount=Decimal("15.00")))
+            splits.append(Split(expense=exp, user=other, amount=Decimal("15.00")))
+        Split.objects.bulk_create(splits, batch_size=1000)
+        return me
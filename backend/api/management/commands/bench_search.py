@@ -0,0 +1,107 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+
+from api.fx import base_currency
+from api.models import Expense
+from api.search import search_expense_ids
+
+WORDS = [
+    "dinner", "lunch", "groceries", "rent", "uber", "taxi", "flight", "hotel",
+    "coffee", "pizza", "movie", "concert", "gas", "electricity", "internet",
+    "drinks", "brunch", "tickets", "museum", "parking", "laundry", "sushi",
+    "tacos", "ramen", "breakfast", "snacks", "bbq", "camping", "ski", "beach",
+]
+
+# Each description also carries one of REFS tokens, so "rare word" queries
+# match roughly expenses / REFS rows.
+REFS = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic ledger inside a transaction, time FTS search against an "
+        "icontains scan, then roll everything back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--expenses", type=int, default=1_000_000)
+        parser.add_argument("--users", type=int, default=500)
+        parser.add_argument("--queries", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **opts):
+        rng = random.Random(opts["seed"])
+        with transaction.atomic():
+            user_ids = self._seed(rng, opts["users"], opts["expenses"])
+            common = [rng.choice(WORDS) for _ in range(opts["queries"])]
+            rare = [f"ref{rng.randrange(REFS)}" for _ in range(opts["queries"])]
+
+            def fts(t):
+                search_expense_ids(rng.choice(user_ids), t, limit=20)
+
+            def scan(t):
+                uid = rng.choice(user_ids)
+                list(
+                    Expense.objects.filter(Q(paid_by_id=uid) | Q(splits__user_id=uid))
+                    .filter(description__icontains=t)
+                    .distinct()
+                    .order_by("-id")[:20]
+                )
+
+            self.stdout.write(f"{opts['expenses']} expenses, {opts['queries']} queries per row")
+            for label, terms in (("common word", common), ("rare word", rare)):
+                self.stdout.write(self._fmt(f"fts5, {label}", self._time(fts, terms)))
+                self.stdout.write(self._fmt(f"icontains, {label}", self._time(scan, terms)))
+            transaction.set_rollback(True)
+
+    def _seed(self, rng, n_users, n_expenses):
+        start = time.perf_counter()
+        prefix = f"bench{rng.randrange(10**9)}-"
+        User.objects.bulk_create([User(username=f"{prefix}{i}") for i in range(n_users)])
+        user_ids = list(User.objects.filter(username__startswith=prefix).values_list("pk", flat=True))
+
+        currency = base_currency()
+        with connection.cursor() as c:
+            c.execute("SELECT COALESCE(MAX(id), 0) FROM api_expense")
+            next_id = c.fetchone()[0] + 1
+            batch = 20_000
+            for lo in range(0, n_expenses, batch):
+                expenses, splits = [], []
+                for eid in range(next_id + lo, next_id + min(lo + batch, n_expenses)):
+                    payer = rng.choice(user_ids)
+                    desc = " ".join(rng.sample(WORDS, 3)) + f" ref{eid % REFS}"
+                    expenses.append((eid, desc, "30.00", currency, "1", payer, "2025-01-01"))
+                    splits.append((eid, payer, "15.00"))
+                    splits.append((eid, rng.choice(user_ids), "15.00"))
+                c.executemany(
+                    "INSERT INTO api_expense "
+                    "(id, description, amount, currency, base_rate, paid_by_id, date) "
+                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    expenses,
+                )
+                c.executemany(
+                    "INSERT INTO api_split (expense_id, user_id, amount) VALUES (%s, %s, %s)",
+                    splits,
+                )
+        self.stdout.write(f"seeded in {time.perf_counter() - start:.1f}s")
+        return user_ids
+
+    @staticmethod
+    def _time(fn, terms):
+        samples = []
+        for t in terms:
+            start = time.perf_counter()
+            fn(t)
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    @staticmethod
+    def _fmt(label, samples):
+        p95 = statistics.quantiles(samples, n=20)[-1] if len(samples) > 1 else samples[0]
+        return f"  {label:<24} p50 {statistics.median(samples):8.2f} ms   p95 {p95:8.2f} ms"
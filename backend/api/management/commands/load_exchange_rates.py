@@ -0,0 +1,60 @@
+import csv
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.fx import FxError, base_currency, normalize_currency, rate_cache, reprice_expenses
+from api.models import ExchangeRate
+
+
+class Command(BaseCommand):
+    help = (
+        "Load date-effective exchange rates from a CSV with columns "
+        "currency,date,rate (1 unit of currency = rate units of BASE_CURRENCY). "
+        "Existing (currency, date) rows are overwritten, and expenses dated on or "
+        "after the earliest loaded date are re-priced at the new rates. Running "
+        "web workers keep their cached rates for up to FX_RATE_CACHE_TTL seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rows = []
+        try:
+            with open(options["path"], newline="") as f:
+                for line, record in enumerate(csv.DictReader(f), start=2):
+                    try:
+                        currency = normalize_currency(record["currency"])
+                        rate = Decimal(record["rate"])
+                        rows.append(ExchangeRate(
+                            currency=currency,
+                            effective_date=date.fromisoformat(record["date"].strip()),
+                            rate=rate,
+                        ))
+                    except (FxError, InvalidOperation, ValueError, KeyError, AttributeError) as e:
+                        raise CommandError(f"line {line}: {e}")
+                    if currency == base_currency() or rate <= 0:
+                        raise CommandError(f"line {line}: rate must be positive and not for {base_currency()}")
+        except OSError as e:
+            raise CommandError(str(e))
+
+        with transaction.atomic():
+            ExchangeRate.objects.bulk_create(
+                rows,
+                batch_size=options["batch_size"],
+                update_conflicts=True,
+                unique_fields=["currency", "effective_date"],
+                update_fields=["rate"],
+            )
+            repriced = 0
+            if rows:
+                repriced = reprice_expenses(
+                    currencies={r.currency for r in rows},
+                    since=min(r.effective_date for r in rows),
+                )
+        rate_cache.clear()
+        self.stdout.write(f"Loaded {len(rows)} exchange rates; re-priced {repriced} expenses.")
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the FTS5 expense search index from api_expense."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--no-optimize", action="store_true", help="Skip merging index segments.")
+
+    def handle(self, *args, **options):
+        rebuild_index(optimize=not options["no_optimize"])
+        self.stdout.write("Expense search index rebuilt.")
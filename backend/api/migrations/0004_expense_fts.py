@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# External-content FTS5 index over Expense.description. Triggers keep it in
+# sync for every write path, including bulk_create() and QuerySet.update()
+# which bypass model signals. manage.py rebuild_expense_search repopulates it.
+#
+# SQLite schema changes that rebuild api_expense (most AlterField/AddField
+# operations) drop these triggers; such migrations must re-run TRIGGER_SQL.
+TRIGGER_SQL = [
+    """
+    CREATE TRIGGER IF NOT EXISTS api_expense_fts_ai AFTER INSERT ON api_expense BEGIN
+        INSERT INTO api_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_expense_fts_ad AFTER DELETE ON api_expense BEGIN
+        INSERT INTO api_expense_fts(api_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS api_expense_fts_au AFTER UPDATE OF description ON api_expense BEGIN
+        INSERT INTO api_expense_fts(api_expense_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO api_expense_fts(rowid, description) VALUES (new.id, new.description);
+    END
+    """,
+    "INSERT INTO api_expense_fts(api_expense_fts) VALUES ('rebuild')",
+]
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE api_expense_fts USING fts5(
+        description,
+        content='api_expense',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    *TRIGGER_SQL,
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS api_expense_fts_au",
+    "DROP TRIGGER IF EXISTS api_expense_fts_ad",
+    "DROP TRIGGER IF EXISTS api_expense_fts_ai",
+    "DROP TABLE IF EXISTS api_expense_fts",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_SQL, DROP_SQL),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_archive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # Later auth migrations rebuild auth_user on SQLite, which would drop
+        # the email index below.
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['-date', '-id'], name='expense_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='friendship',
+            index=models.Index(fields=['to_user', 'accepted'], name='friendship_to_accepted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='split',
+            index=models.Index(fields=['user', 'expense', 'amount'], name='split_user_expense_amt_idx'),
+        ),
+        # auth.User belongs to django.contrib.auth, so its email index (used by
+        # login, register and add_friend) is created directly.
+        migrations.RunSQL(
+            'CREATE INDEX auth_user_email_idx ON auth_user (email)',
+            'DROP INDEX auth_user_email_idx',
+        ),
+    ]
@@ -0,0 +1,138 @@
+# Generated by Django 5.2.6 on 2026-10-19 16:25
+
+from importlib import import_module
+
+import api.models
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth
+
+# Adding Expense.currency rebuilds api_expense on SQLite, dropping the FTS sync
+# triggers; put them back afterwards (and again when migrating backwards).
+EXPENSE_FTS_TRIGGERS = import_module('api.migrations.0004_expense_fts').TRIGGER_SQL
+
+
+def rebuild_snapshots(apps, schema_editor):
+    """
+    BalanceSnapshot only summarises the archive tables, so it is recreated
+    rather than altered. Regroup the archived splits to whichever key the
+    snapshot model has at this point: (creditor, debtor) before this
+    migration, (creditor, debtor, currency, month) after it. Everything
+    archived before this migration is in the base currency, so base_amount
+    is the amount itself. The new shape also keeps (payer, payer) rows with
+    what each user paid for archived expenses.
+    """
+    ArchivedExpense = apps.get_model('api', 'ArchivedExpense')
+    ArchivedSplit = apps.get_model('api', 'ArchivedSplit')
+    BalanceSnapshot = apps.get_model('api', 'BalanceSnapshot')
+
+    keys = {'creditor_id': F('expense__paid_by'), 'debtor_id': F('user')}
+    multi_currency = any(f.name == 'currency' for f in BalanceSnapshot._meta.get_fields())
+    if multi_currency:
+        keys.update(currency=F('expense__currency'), date=TruncMonth('expense__date'))
+    totals = (
+        ArchivedSplit.objects.exclude(user=F('expense__paid_by'))
+        .values(**keys)
+        .annotate(total=Sum('amount'))
+        .order_by()
+    )
+    rows = list(totals.iterator())
+    if multi_currency:
+        paid = (
+            ArchivedExpense.objects.values('paid_by_id', 'currency', month=TruncMonth('date'))
+            .annotate(total=Sum('amount'))
+            .order_by()
+        )
+        rows += [
+            {
+                'creditor_id': row['paid_by_id'],
+                'debtor_id': row['paid_by_id'],
+                'currency': row['currency'],
+                'date': row['month'],
+                'total': row['total'],
+            }
+            for row in paid.iterator()
+        ]
+    snapshots = []
+    for row in rows:
+        row['amount'] = row.pop('total')
+        if multi_currency:
+            row['base_amount'] = row['amount']
+        snapshots.append(BalanceSnapshot(**row))
+    BalanceSnapshot.objects.bulk_create(snapshots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_hot_query_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunSQL(migrations.RunSQL.noop, EXPENSE_FTS_TRIGGERS),
+        migrations.RunPython(migrations.RunPython.noop, rebuild_snapshots),
+        migrations.DeleteModel(
+            name='BalanceSnapshot',
+        ),
+        migrations.AddField(
+            model_name='archivedexpense',
+            name='currency',
+            field=models.CharField(default=api.models.base_currency, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='archivedexpense',
+            name='base_rate',
+            field=models.DecimalField(decimal_places=10, default=1, max_digits=20),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='currency',
+            field=models.CharField(default=api.models.base_currency, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='expense',
+            name='base_rate',
+            field=models.DecimalField(decimal_places=10, default=1, max_digits=20),
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('base_amount', models.DecimalField(decimal_places=10, default=0, max_digits=24)),
+                ('currency', models.CharField(default=api.models.base_currency, max_length=3)),
+                ('date', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('creditor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot_credits', to=settings.AUTH_USER_MODEL)),
+                ('debtor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshot_debts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('creditor', 'debtor', 'currency', 'date')},
+            },
+        ),
+        migrations.RunPython(rebuild_snapshots, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ExchangeRate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('currency', models.CharField(max_length=3)),
+                ('effective_date', models.DateField()),
+                ('rate', models.DecimalField(decimal_places=10, max_digits=20)),
+            ],
+            options={
+                'unique_together': {('currency', 'effective_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Profile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('home_currency', models.CharField(default=api.models.base_currency, max_length=3)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunSQL(EXPENSE_FTS_TRIGGERS, migrations.RunSQL.noop),
+    ]
@@ -1,10 +1,21 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+def base_currency() -> str:
+    """settings.BASE_CURRENCY, read when called so currency defaults follow it."""
+    return getattr(settings, "BASE_CURRENCY", "USD")
 
 
 class Expense(models.Model):
     description = models.CharField(max_length=200)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=base_currency)
+    # Units of BASE_CURRENCY per unit of `currency` on `date`, copied from
+    # ExchangeRate when the expense is written and again whenever rates are
+    # loaded (fx.reprice_expenses), so balance reads never look rates up.
+    base_rate = models.DecimalField(max_digits=20, decimal_places=10, default=1)
     paid_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -12,6 +23,12 @@ class Expense(models.Model):
     )
     date = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Newest-first listings; id breaks ties between same-day expenses.
+            models.Index(fields=["-date", "-id"], name="expense_date_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.description} - {self.amount}"
 
@@ -25,6 +42,12 @@ class Split(models.Model):
     )
     amount = models.DecimalField(max_digits=10, decimal_places=2)
 
+    class Meta:
+        indexes = [
+            # Covers "my splits" balance reads without touching the table.
+            models.Index(fields=["user", "expense", "amount"], name="split_user_expense_amt_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} owes {self.amount} for {self.expense.description}"
 
@@ -45,6 +68,9 @@ class Friendship(models.Model):
 
     class Meta:
         unique_together = ("from_user", "to_user")
+        indexes = [
+            models.Index(fields=["to_user", "accepted"], name="friendship_to_accepted_idx"),
+        ]
 
     def __str__(self):
         status = "accepted" if self.accepted else "pending"
@@ -61,3 +87,120 @@ class Group(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class IdempotencyKey(models.Model):
+    """
+    Remembers the response to a write made with an Idempotency-Key header so
+    a retried request can be answered without touching the ledger again.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        unique_together = ("user", "key")
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.response_status})"
+
+
+class ArchivedExpense(models.Model):
+    """
+    Cold copy of an Expense moved out of the hot tables by archive_expenses.
+    Keeps the original id so links and idempotent replays still make sense.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    description = models.CharField(max_length=200)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    currency = models.CharField(max_length=3, default=base_currency)
+    base_rate = models.DecimalField(max_digits=20, decimal_places=10, default=1)
+    paid_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_expenses_paid"
+    )
+    date = models.DateField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.description} - {self.amount} (archived)"
+
+
+class ArchivedSplit(models.Model):
+    expense = models.ForeignKey(ArchivedExpense, on_delete=models.CASCADE, related_name="splits")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_splits"
+    )
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+
+
+class BalanceSnapshot(models.Model):
+    """
+    What `debtor` owed `creditor` across archived expenses in one currency
+    during one month (`date` is the first of that month). `amount` is in
+    `currency`; `base_amount` is the same debt in BASE_CURRENCY, each split
+    valued at its expense's base_rate. Balance reads use these exactly as
+    they use live splits (see fx.convert_totals), so archiving never changes
+    a total in any currency. Rows with creditor == debtor instead hold what
+    that user paid for archived expenses; only summary's fallback reads them.
+    """
+    creditor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="snapshot_credits",
+    )
+    debtor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="snapshot_debts",
+    )
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    base_amount = models.DecimalField(max_digits=24, decimal_places=10, default=0)
+    currency = models.CharField(max_length=3, default=base_currency)
+    date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("creditor", "debtor", "currency", "date")
+
+    def __str__(self):
+        return f"{self.debtor_id} owes {self.creditor_id} {self.amount} (archived)"
+
+
+class ExchangeRate(models.Model):
+    """
+    1 unit of `currency` is worth `rate` units of settings.BASE_CURRENCY from
+    `effective_date` until the next row for that currency.
+    Loaded with manage.py load_exchange_rates.
+    """
+    currency = models.CharField(max_length=3)
+    effective_date = models.DateField()
+    rate = models.DecimalField(max_digits=20, decimal_places=10)
+
+    class Meta:
+        unique_together = ("currency", "effective_date")
+
+    def __str__(self):
+        return f"{self.currency} {self.effective_date}: {self.rate}"
+
+
+class Profile(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="profile",
+    )
+    home_currency = models.CharField(max_length=3, default=base_currency)
+
+    def __str__(self):
+        return f"{self.user.username} ({self.home_currency})"
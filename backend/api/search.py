@@ -0,0 +1,88 @@
+import base64
+import json
+import re
+
+from django.db import connection
+
+FTS_TABLE = "api_expense_fts"
+MAX_LIMIT = 100
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# Ranked matches limited to expenses the user paid or has a split in. The
+# split filter is an uncorrelated IN so SQLite builds the user's expense set
+# once instead of probing api_split for every matching row.
+# bm25() is lower-is-better, so (rank, id) ascending is both the display
+# order and the keyset the cursor resumes from.
+_SEARCH_SQL = f"""
+    SELECT id, rank FROM (
+        SELECT e.id AS id, bm25({FTS_TABLE}) AS rank
+        FROM {FTS_TABLE}
+        JOIN api_expense e ON e.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s
+          AND (
+            e.paid_by_id = %s
+            OR e.id IN (SELECT expense_id FROM api_split WHERE user_id = %s)
+          )
+    )
+    WHERE rank > %s OR (rank = %s AND id > %s)
+    ORDER BY rank, id
+    LIMIT %s
+"""
+
+
+class SearchError(ValueError):
+    """Raised for an unusable query string or cursor."""
+
+
+def build_match(q: str) -> str:
+    """
+    Turn free text into a safe FTS5 expression: every word is quoted (so
+    operators and punctuation in user input can't break the query) and
+    prefix-matched, and all words must match.
+    """
+    terms = _TERM_RE.findall(q or "")
+    if not terms:
+        raise SearchError("q must contain at least one word")
+    return " ".join(f'"{t}"*' for t in terms)
+
+
+def encode_cursor(rank: float, expense_id: int) -> str:
+    raw = json.dumps([rank, expense_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[float, int]:
+    try:
+        rank, expense_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(expense_id)
+    except (ValueError, TypeError):
+        raise SearchError("invalid cursor")
+
+
+def search_expense_ids(user_id: int, q: str, limit: int = 20, cursor: str | None = None):
+    """
+    Return ([expense_id, ...], next_cursor) for the best matches of q that
+    user_id paid or shares in. next_cursor is None on the last page.
+    """
+    match = build_match(q)
+    limit = max(1, min(int(limit), MAX_LIMIT))
+    after_rank, after_id = decode_cursor(cursor) if cursor else (float("-inf"), 0)
+
+    with connection.cursor() as c:
+        c.execute(
+            _SEARCH_SQL,
+            [match, user_id, user_id, after_rank, after_rank, after_id, limit + 1],
+        )
+        rows = c.fetchall()
+
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1][1], page[-1][0]) if len(rows) > limit else None
+    return [row[0] for row in page], next_cursor
+
+
+def rebuild_index(optimize: bool = True) -> None:
+    with connection.cursor() as c:
+        c.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        if optimize:
+            c.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
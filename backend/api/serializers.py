@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Expense, Split, Friendship, Group
+from .models import ArchivedExpense, ArchivedSplit, Expense, Split, Friendship, Group
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -29,7 +29,24 @@ class ExpenseSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Expense
-        fields = ["id", "description", "amount", "date", "paid_by", "paid_by_id", "splits"]
+        fields = ["id", "description", "amount", "currency", "date", "paid_by", "paid_by_id", "splits"]
+
+
+class ArchivedSplitSerializer(serializers.ModelSerializer):
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedSplit
+        fields = ["id", "user", "amount"]
+
+
+class ArchivedExpenseSerializer(serializers.ModelSerializer):
+    paid_by = UserSerializer(read_only=True)
+    splits = ArchivedSplitSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedExpense
+        fields = ["id", "description", "amount", "currency", "date", "archived_at", "paid_by", "splits"]
 
 
 class FriendshipSerializer(serializers.ModelSerializer):
@@ -0,0 +1,129 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from fractions import Fraction
+
+CENT = Decimal("0.01")
+# Expense.amount and Split.amount are DecimalField(max_digits=10, decimal_places=2).
+MAX_CENTS = 10**10 - 1
+# Bounds on percent/shares so a request can't make largest_remainder() build
+# enormous Fractions.
+MAX_WEIGHT = Decimal(10**9)
+WEIGHT_STEP = Decimal("0.000001")
+
+SPLIT_TYPES = ("equal", "percentage", "shares", "exact")
+
+
+class SplitError(ValueError):
+    """Raised when a split request cannot be allocated."""
+
+
+def to_cents(value) -> int:
+    """Parse a money value into an integer number of cents."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        raise SplitError(f"amount must be a number, got {value!r}")
+    if not amount.is_finite():
+        raise SplitError(f"amount must be a number, got {value!r}")
+    try:
+        cents = int(amount.quantize(CENT, rounding=ROUND_HALF_UP) * 100)
+    except InvalidOperation:  # more digits than the decimal context holds
+        cents = None
+    if cents is None or abs(cents) > MAX_CENTS:
+        raise SplitError(f"amount must be at most {from_cents(MAX_CENTS)}")
+    return cents
+
+
+def from_cents(cents: int) -> Decimal:
+    return (Decimal(cents) / 100).quantize(CENT)
+
+
+def _weight(entry, key):
+    try:
+        w = Decimal(str(entry[key]))
+    except KeyError:
+        raise SplitError(f"each split needs a '{key}'")
+    except (InvalidOperation, TypeError, ValueError):
+        raise SplitError(f"invalid {key}: {entry[key]!r}")
+    if not w.is_finite() or w < 0:
+        raise SplitError(f"invalid {key}: {entry[key]!r}")
+    if w > MAX_WEIGHT or w != w.quantize(WEIGHT_STEP):
+        raise SplitError(f"{key} must be at most {MAX_WEIGHT} with at most 6 decimal places")
+    return w
+
+
+def largest_remainder(total_cents: int, weights: list) -> list[int]:
+    """
+    Apportion total_cents across weights so the parts sum exactly to the total.
+    Every part gets the floor of its exact share; the leftover cents go to the
+    largest fractional remainders, earlier entries winning ties.
+    """
+    total_weight = sum(Fraction(w) for w in weights)
+    if total_weight <= 0:
+        raise SplitError("split weights must add up to more than zero")
+
+    exact = [Fraction(total_cents) * Fraction(w) / total_weight for w in weights]
+    parts = [int(x // 1) for x in exact]
+    leftover = total_cents - sum(parts)
+    order = sorted(range(len(exact)), key=lambda i: (-(exact[i] - parts[i]), i))
+    for i in order[:leftover]:
+        parts[i] += 1
+    return parts
+
+
+def parse_user_id(entry) -> int:
+    uid = entry.get("user_id", entry.get("user")) if isinstance(entry, dict) else None
+    if isinstance(uid, dict):
+        uid = uid.get("id")
+    try:
+        return int(uid)
+    except (TypeError, ValueError):
+        raise SplitError(f"invalid split user: {uid!r}")
+
+
+def allocate(amount, split_type: str, entries: list) -> list[tuple[int, Decimal]]:
+    """
+    Turn a split request into [(user_id, amount), ...] that sums to amount.
+
+    split_type:
+      equal       -> [{"user_id": 2}, ...]
+      percentage  -> [{"user_id": 2, "percent": 60}, ...]  (must total 100)
+      shares      -> [{"user_id": 2, "shares": 3}, ...]
+      exact       -> [{"user_id": 2, "amount": 12.50}, ...] (must total amount)
+    """
+    if split_type not in SPLIT_TYPES:
+        raise SplitError(f"split_type must be one of: {', '.join(SPLIT_TYPES)}")
+    if not isinstance(entries, list) or not entries:
+        raise SplitError("splits must be a non-empty list")
+
+    total_cents = to_cents(amount)
+    if total_cents <= 0:
+        raise SplitError("amount must be greater than zero")
+
+    user_ids = [parse_user_id(e) for e in entries]
+    if len(set(user_ids)) != len(user_ids):
+        raise SplitError("each user can only appear once in splits")
+
+    if split_type == "equal":
+        parts = largest_remainder(total_cents, [1] * len(entries))
+    elif split_type == "percentage":
+        weights = [_weight(e, "percent") for e in entries]
+        if sum(weights) != 100:
+            raise SplitError("percentages must add up to 100")
+        parts = largest_remainder(total_cents, weights)
+    elif split_type == "shares":
+        parts = largest_remainder(total_cents, [_weight(e, "shares") for e in entries])
+    else:
+        parts = []
+        for e in entries:
+            if "amount" not in e:
+                raise SplitError("each split needs an 'amount'")
+            cents = to_cents(e["amount"])
+            if cents < 0:
+                raise SplitError(f"invalid amount: {e['amount']!r}")
+            parts.append(cents)
+        if sum(parts) != total_cents:
+            raise SplitError(
+                f"splits add up to {from_cents(sum(parts))}, expected {from_cents(total_cents)}"
+            )
+
+    return [(uid, from_cents(c)) for uid, c in zip(user_ids, parts)]
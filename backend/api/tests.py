@@ -1,3 +1,585 @@
-from django.test import TestCase
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import F
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .archive import archive_batch
+from .fx import RateCache, rate_cache, rates_for, reprice_expenses
+from .idempotency import purge_expired
+from .loadgen import parse_mix, percentile
+from .models import (
+    ArchivedExpense,
+    BalanceSnapshot,
+    ExchangeRate,
+    Expense,
+    Friendship,
+    IdempotencyKey,
+    Profile,
+    Split,
+)
+from .search import rebuild_index
+from .splits import SplitError, allocate, largest_remainder
+
+
+class SplitEngineTests(TestCase):
+    def test_equal_split_distributes_leftover_cents(self):
+        result = allocate("100.00", "equal", [{"user_id": 1}, {"user_id": 2}, {"user_id": 3}])
+        self.assertEqual([a for _, a in result], [Decimal("33.34"), Decimal("33.33"), Decimal("33.33")])
+
+    def test_percentage_split(self):
+        result = allocate("10", "percentage", [
+            {"user_id": 1, "percent": "33.3"},
+            {"user_id": 2, "percent": "66.7"},
+        ])
+        self.assertEqual(dict(result), {1: Decimal("3.33"), 2: Decimal("6.67")})
+
+    def test_percentage_must_total_100(self):
+        with self.assertRaises(SplitError):
+            allocate("10", "percentage", [{"user_id": 1, "percent": 50}])
+
+    def test_shares_split(self):
+        result = allocate("10", "shares", [{"user_id": 1, "shares": 1}, {"user_id": 2, "shares": 2}])
+        self.assertEqual(dict(result), {1: Decimal("3.33"), 2: Decimal("6.67")})
+
+    def test_exact_split_must_match_amount(self):
+        with self.assertRaises(SplitError):
+            allocate("10", "exact", [{"user_id": 1, "amount": 4}, {"user_id": 2, "amount": 5}])
+
+    def test_duplicate_users_rejected(self):
+        with self.assertRaises(SplitError):
+            allocate("10", "equal", [{"user_id": 1}, {"user": 1}])
+
+    def test_largest_remainder_always_sums_to_total(self):
+        for n in (1, 3, 7, 299):
+            self.assertEqual(sum(largest_remainder(100001, [1] * n)), 100001)
+
+    def test_out_of_range_values_rejected(self):
+        for amount in ("1e30", "123456789012"):
+            with self.assertRaises(SplitError):
+                allocate(amount, "equal", [{"user_id": 1}])
+        for shares in ("1e2000000", "1e-2000000"):
+            with self.assertRaises(SplitError):
+                allocate("10", "shares", [{"user_id": 1, "shares": shares}, {"user_id": 2, "shares": 1}])
+
+
+class CreateExpenseTests(TestCase):
+    def setUp(self):
+        self.me = User.objects.create_user("me", "me@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def _make_users(self, n):
+        prefix = f"group{n}-"
+        User.objects.bulk_create([User(username=f"{prefix}{i}") for i in range(n)])
+        return list(User.objects.filter(username__startswith=prefix).values_list("pk", flat=True))
+
+    def test_create_equal_split(self):
+        ids = self._make_users(2) + [self.me.id]
+        res = self.client.post("/api/expenses/", {
+            "description": "Dinner",
+            "amount": "100",
+            "split_type": "equal",
+            "splits": [{"user_id": uid} for uid in ids],
+        }, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(Split.objects.count(), 3)
+        total = sum(Decimal(s["amount"]) for s in res.data["splits"])
+        self.assertEqual(total, Decimal("100.00"))
+
+    def test_unknown_participant_creates_nothing(self):
+        res = self.client.post("/api/expenses/", {
+            "description": "Dinner",
+            "amount": "10",
+            "split_type": "equal",
+            "splits": [{"user_id": self.me.id}, {"user_id": 99999}],
+        }, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_oversized_amounts_get_a_400(self):
+        for payload in (
+            {"amount": "1e30"},
+            {"amount": "123456789012"},
+            {"amount": "10", "splits": [{"user_id": self.me.id, "amount": "1e30"}]},
+        ):
+            res = self.client.post("/api/expenses/", {"description": "Yacht", **payload}, format="json")
+            self.assertEqual(res.status_code, 400, payload)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_query_count_is_constant_in_group_size(self):
+        """Benchmark: a 3-person and a 300-person expense cost the same number of queries."""
+        counts = []
+        for n in (3, 300):
+            ids = self._make_users(n)
+            payload = {
+                "description": f"Trip for {n}",
+                "amount": "1000",
+                "split_type": "shares",
+                "splits": [{"user_id": uid, "shares": i % 3 + 1} for i, uid in enumerate(ids)],
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.client.post("/api/expenses/", payload, format="json")
+            self.assertEqual(res.status_code, 201)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.me = User.objects.create_user("me", "me@example.com", "pw")
+        self.friend = User.objects.create_user("friend", "friend@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def _post_expense(self, key, amount="10"):
+        return self.client.post("/api/expenses/", {
+            "description": "Taxi",
+            "amount": amount,
+            "split_type": "equal",
+            "splits": [{"user_id": self.me.id}, {"user_id": self.friend.id}],
+        }, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retried_expense_is_created_once(self):
+        first = self._post_expense("abc")
+        second = self._post_expense("abc")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(first.data["id"], second.data["id"])
+        self.assertEqual(Expense.objects.count(), 1)
+        self.assertEqual(Split.objects.count(), 2)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self._post_expense("abc")
+        res = self._post_expense("abc", amount="20")
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(Expense.objects.count(), 1)
+
+    def test_keys_are_scoped_per_user(self):
+        self._post_expense("abc")
+        self.client.force_authenticate(self.friend)
+        self._post_expense("abc")
+        self.assertEqual(Expense.objects.count(), 2)
+
+    def test_retried_friend_request_is_replayed(self):
+        body = {"email": "friend@example.com"}
+        first = self.client.post("/api/friends/add/", body, format="json", HTTP_IDEMPOTENCY_KEY="f1")
+        second = self.client.post("/api/friends/add/", body, format="json", HTTP_IDEMPOTENCY_KEY="f1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(Friendship.objects.count(), 1)
+
+    def test_purge_expired_removes_old_keys_only(self):
+        self._post_expense("old")
+        self._post_expense("new", amount="20")
+        IdempotencyKey.objects.filter(key="old").update(
+            created_at=IdempotencyKey.objects.get(key="old").created_at - timedelta(days=2)
+        )
+        self.assertEqual(purge_expired(batch_size=1), 1)
+        self.assertEqual(list(IdempotencyKey.objects.values_list("key", flat=True)), ["new"])
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    def test_concurrent_duplicates_create_one_expense(self):
+        me = User.objects.create_user("me", "me@example.com", "pw")
+        friend = User.objects.create_user("friend", "friend@example.com", "pw")
+        payload = {
+            "description": "Taxi",
+            "amount": "10",
+            "split_type": "equal",
+            "splits": [{"user_id": me.id}, {"user_id": friend.id}],
+        }
+        start = threading.Barrier(8)
+
+        def post():
+            client = APIClient()
+            client.force_authenticate(me)
+            try:
+                start.wait()
+                return client.post("/api/expenses/", payload, format="json", HTTP_IDEMPOTENCY_KEY="k1")
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            responses = list(pool.map(lambda _: post(), range(8)))
+
+        self.assertEqual([r.status_code for r in responses], [201] * 8)
+        self.assertEqual(len({r.data["id"] for r in responses}), 1)
+        replayed = [r for r in responses if r.get("Idempotent-Replayed") == "true"]
+        self.assertEqual(len(replayed), 7)
+        self.assertEqual(Expense.objects.count(), 1)
+        self.assertEqual(Split.objects.count(), 2)
+
+
+class ExpenseSearchTests(TestCase):
+    def setUp(self):
+        self.me = User.objects.create_user("me", "me@example.com", "pw")
+        self.other = User.objects.create_user("other", "other@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+
+    def _search(self, q, **params):
+        return self.client.get("/api/expenses/search/", {"q": q, **params})
+
+    def test_only_returns_expenses_the_caller_is_part_of(self):
+        mine = Expense.objects.create(description="Pizza night", amount=20, paid_by=self.me)
+        shared = Expense.objects.create(description="Pizza lunch", amount=20, paid_by=self.other)
+        Split.objects.create(expense=shared, user=self.me, amount=10)
+        Expense.objects.create(description="Pizza party", amount=20, paid_by=self.other)
+
+        res = self._search("pizza")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual({e["id"] for e in res.data["results"]}, {mine.id, shared.id})
+
+    def test_index_follows_updates_and_deletes(self):
+        exp = Expense.objects.create(description="Coffee", amount=5, paid_by=self.me)
+        Expense.objects.filter(pk=exp.pk).update(description="Tea")
+        self.assertEqual(self._search("coffee").data["results"], [])
+        self.assertEqual(len(self._search("tea").data["results"]), 1)
+        exp.delete()
+        self.assertEqual(self._search("tea").data["results"], [])
+
+    def test_keyset_pagination_visits_every_match_once(self):
+        Expense.objects.bulk_create([
+            Expense(description=f"Taxi ride {i}", amount=1, paid_by=self.me) for i in range(7)
+        ])
+        rebuild_index()
+        seen, cursor = [], None
+        while True:
+            params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+            data = self._search("taxi", **params).data
+            seen += [e["id"] for e in data["results"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                break
+        self.assertEqual(sorted(seen), sorted(Expense.objects.values_list("id", flat=True)))
+
+    def test_query_syntax_is_not_interpreted(self):
+        Expense.objects.create(description="Rent", amount=5, paid_by=self.me)
+        self.assertEqual(self._search('rent" OR "x').status_code, 200)
+        self.assertEqual(self._search("!!!").status_code, 400)
+
+    def test_bad_limit_gets_a_fixed_message(self):
+        res = self._search("rent", limit="abc")
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data, {"error": "limit must be an integer"})
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.me = User.objects.create_user("me", "me@example.com", "pw")
+        self.a = User.objects.create_user("a", "a@example.com", "pw")
+        self.b = User.objects.create_user("b", "b@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+        for payer, debtor, amt, day in [
+            (self.me, self.a, 10, date(2020, 1, 1)),
+            (self.a, self.me, 4, date(2020, 2, 1)),
+            (self.b, self.me, 7, date(2020, 3, 1)),
+            (self.me, self.b, 5, date.today()),
+        ]:
+            exp = Expense.objects.create(description="x", amount=amt * 2, paid_by=payer)
+            Expense.objects.filter(pk=exp.pk).update(date=day)
+            Split.objects.create(expense=exp, user=payer, amount=amt)
+            Split.objects.create(expense=exp, user=debtor, amount=amt)
+
+    def _balances(self, currency):
+        params = {"currency": currency}
+        return self.client.get("/api/summary/", params).data, self.client.get("/api/balances/", params).data
+
+    def test_archiving_keeps_balances_unchanged(self):
+        rate_cache.clear()
+        ExchangeRate.objects.bulk_create([
+            ExchangeRate(currency="EUR", effective_date=date(2019, 1, 1), rate=Decimal("1.10")),
+            ExchangeRate(currency="GBP", effective_date=date(2020, 1, 15), rate=Decimal("1.25")),
+            ExchangeRate(currency="GBP", effective_date=date(2020, 1, 25), rate=Decimal("1.30")),
+        ])
+        # Two GBP expenses in one month at different rates share a snapshot.
+        for day, amt in ((date(2020, 1, 20), 8), (date(2020, 1, 28), 6)):
+            exp = Expense.objects.create(description="x", amount=amt * 2, currency="GBP", paid_by=self.a)
+            Expense.objects.filter(pk=exp.pk).update(date=day)
+            Split.objects.create(expense=exp, user=self.a, amount=amt)
+            Split.objects.create(expense=exp, user=self.me, amount=amt)
+        reprice_expenses()
+
+        currencies = ("USD", "EUR", "GBP")
+        before = {c: self._balances(c) for c in currencies}
+        while archive_batch(date(2021, 1, 1), batch_size=2):
+            pass
+        self.assertEqual(Expense.objects.count(), 1)
+        self.assertEqual(ArchivedExpense.objects.count(), 5)
+        # One row per owing pair and month, one per payer and month.
+        self.assertEqual(BalanceSnapshot.objects.exclude(creditor=F("debtor")).count(), 4)
+        self.assertEqual(BalanceSnapshot.objects.filter(creditor=F("debtor")).count(), 4)
+        self.assertEqual({c: self._balances(c) for c in currencies}, before)
+
+    def test_archiving_keeps_totals_of_users_without_splits(self):
+        rate_cache.clear()
+        ExchangeRate.objects.create(currency="EUR", effective_date=date(2019, 1, 1), rate=Decimal("1.10"))
+        loner = User.objects.create_user("loner", "loner@example.com", "pw")
+        for amt, currency in ((8, "USD"), (5, "EUR")):
+            exp = Expense.objects.create(description="Solo", amount=amt, currency=currency, paid_by=loner)
+            Expense.objects.filter(pk=exp.pk).update(date=date(2020, 5, 1))
+        reprice_expenses()
+        self.client.force_authenticate(loner)
+
+        before = self._balances("EUR")
+        archive_batch(date(2021, 1, 1))
+        self.assertFalse(Expense.objects.filter(paid_by=loner).exists())
+        self.assertEqual(self._balances("EUR"), before)
+        self.assertEqual(before[0]["total_owed_to_me"], round(8 / 1.10 + 5, 2))
+
+    def test_command_times_the_same_users_reads(self):
+        out = StringIO()
+        call_command("archive_expenses", "--before", "2021-01-01", stdout=out)
+        out = out.getvalue()
+        self.assertIn("Endpoint timings are for me.", out)
+        self.assertRegex(out, r"summary_ms\s+[\d.]+\s+[\d.]+")
+        self.assertRegex(out, r"balances_ms\s+[\d.]+\s+[\d.]+")
+
+    def test_snapshots_are_kept_per_month(self):
+        exp = Expense.objects.create(description="x", amount=6, paid_by=self.me)
+        Expense.objects.filter(pk=exp.pk).update(date=date(2020, 1, 20))
+        Split.objects.create(expense=exp, user=self.me, amount=3)
+        Split.objects.create(expense=exp, user=self.a, amount=3)
+
+        archive_batch(date(2021, 1, 1))
+        snap = BalanceSnapshot.objects.get(creditor=self.me, debtor=self.a)
+        self.assertEqual(snap.date, date(2020, 1, 1))
+        self.assertEqual(snap.amount, Decimal("13.00"))
+
+    def test_archived_history_is_readable(self):
+        archive_batch(date(2021, 1, 1))
+        res = self.client.get("/api/expenses/archive/", {"limit": 2})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data["results"]), 2)
+        res = self.client.get("/api/expenses/archive/", {"before_id": res.data["next_before_id"]})
+        self.assertEqual(len(res.data["results"]), 1)
+
+
+# "SCAN api_split" (3.36+) / "SCAN TABLE api_split" (older) with no index.
+FULL_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)$")
+
+
+class QueryPlanTests(TestCase):
+    """
+    Runs EXPLAIN QUERY PLAN over every SELECT the hot endpoints issue and
+    fails if one reads a whole table or sorts a listing in a temp b-tree.
+    """
+
+    def setUp(self):
+        self.me = User.objects.create_user("me", "me@example.com", "pw")
+        self.friend = User.objects.create_user("friend", "friend@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+        for payer, ower in [(self.me, self.friend), (self.friend, self.me)]:
+            exp = Expense.objects.create(description="Lunch", amount=10, paid_by=payer)
+            Split.objects.create(expense=exp, user=payer, amount=5)
+            Split.objects.create(expense=exp, user=ower, amount=5)
+        Friendship.objects.create(from_user=self.friend, to_user=self.me)
+
+    def assertNoFullScans(self, method, path, data=None, client=None):
+        client = client or self.client
+        with CaptureQueriesContext(connection) as ctx:
+            res = getattr(client, method)(path, data, format="json")
+        self.assertLess(res.status_code, 500)
+        selects = [q["sql"] for q in ctx.captured_queries if q["sql"].lstrip().upper().startswith("SELECT")]
+        self.assertTrue(selects, f"{path} issued no SELECTs")
+        with connection.cursor() as c:
+            for sql in selects:
+                c.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plan = [row[-1] for row in c.fetchall()]
+                for step in plan:
+                    self.assertIsNone(
+                        FULL_SCAN_RE.match(step), f"{path} full scan:\n{sql}\n" + "\n".join(plan)
+                    )
+                    self.assertNotIn(
+                        "TEMP B-TREE FOR ORDER BY", step, f"{path} sorts in memory:\n{sql}"
+                    )
+
+    def test_summary(self):
+        self.assertNoFullScans("get", "/api/summary/")
+
+    def test_balances(self):
+        self.assertNoFullScans("get", "/api/balances/")
+
+    def test_summary_fallback_for_user_without_splits(self):
+        loner = User.objects.create_user("loner", "loner@example.com", "pw")
+        Expense.objects.create(description="Solo", amount=8, paid_by=loner)
+        client = APIClient()
+        client.force_authenticate(loner)
+        self.assertNoFullScans("get", "/api/summary/", client=client)
+        self.assertEqual(client.get("/api/summary/").data["total_owed_to_me"], 8.0)
+
+    def test_expense_listings(self):
+        self.assertNoFullScans("get", "/api/expenses/")
+        self.assertNoFullScans("get", "/api/recent-expenses/")
+
+    def test_friend_endpoints(self):
+        self.assertNoFullScans("post", "/api/friends/add/", {"email": "friend@example.com"})
+        self.assertNoFullScans("get", "/api/friends/")
+
+    def test_pending_requests_lookup(self):
+        qs = Friendship.objects.filter(to_user=self.me, accepted=False)
+        with connection.cursor() as c:
+            c.execute(f"EXPLAIN QUERY PLAN {qs.query}")
+            self.assertIn("friendship_to_accepted_idx", " ".join(r[-1] for r in c.fetchall()))
+
+    def test_auth_endpoints(self):
+        anon = APIClient()
+        self.assertNoFullScans("post", "/api/auth/login/", {"username": "me@example.com", "password": "pw"}, anon)
+        self.assertNoFullScans(
+            "post", "/api/auth/register/", {"username": "new", "email": "new@example.com", "password": "pw"}, anon
+        )
+
+
+class LoadgenTests(TransactionTestCase):
+    def test_helpers(self):
+        self.assertEqual(parse_mix("dashboard=3,login=1"), {"dashboard": 3, "login": 1})
+        with self.assertRaises(ValueError):
+            parse_mix("checkout=1")
+        self.assertEqual(percentile([5, 1, 4, 2, 3], 50), 3)
+        self.assertEqual(percentile([5, 1, 4, 2, 3], 99), 5)
+
+    def test_short_run_reports_and_cleans_up(self):
+        out = StringIO()
+        call_command(
+            "loadgen", duration=0.5, interval=0.25, users=3, concurrency=2,
+            mix="dashboard=3,create_expense=1,create_group=1", seed=1, stdout=out,
+        )
+        self.assertIn("TOTAL", out.getvalue())
+        self.assertIn("summary", out.getvalue())
+        self.assertFalse(User.objects.filter(username__startswith="loadgen-").exists())
+        self.assertFalse(Expense.objects.exists())
+
+
+class CurrencyTests(TestCase):
+    def setUp(self):
+        rate_cache.clear()
+        self.me = User.objects.create_user("me", "me@example.com", "pw")
+        self.friend = User.objects.create_user("friend", "friend@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.me)
+        ExchangeRate.objects.bulk_create([
+            ExchangeRate(currency="EUR", effective_date=date(2025, 1, 1), rate=Decimal("1.10")),
+            ExchangeRate(currency="EUR", effective_date=date(2025, 6, 1), rate=Decimal("1.20")),
+            ExchangeRate(currency="GBP", effective_date=date(2025, 1, 1), rate=Decimal("1.25")),
+        ])
+
+    def _expense(self, payer, ower, amount, currency, day):
+        exp = Expense.objects.create(description="x", amount=amount * 2, currency=currency, paid_by=payer)
+        Expense.objects.filter(pk=exp.pk).update(date=day)
+        reprice_expenses()
+        Split.objects.create(expense=exp, user=payer, amount=amount)
+        Split.objects.create(expense=exp, user=ower, amount=amount)
+
+    def test_rates_are_date_effective(self):
+        rates = rates_for({("EUR", date(2025, 3, 1)), ("EUR", date(2025, 7, 1)), ("USD", date(2025, 3, 1))})
+        self.assertEqual(rates[("EUR", date(2025, 3, 1))], Decimal("1.10"))
+        self.assertEqual(rates[("EUR", date(2025, 7, 1))], Decimal("1.20"))
+        self.assertEqual(rates[("USD", date(2025, 3, 1))], 1)
+
+    def test_misses_resolve_in_one_query_then_hit_cache(self):
+        buckets = {("EUR", date(2025, 3, 1)), ("GBP", date(2025, 3, 1)), ("EUR", date(2025, 8, 1))}
+        with self.assertNumQueries(1):
+            rates_for(buckets)
+        with self.assertNumQueries(0):
+            rates_for(buckets)
+
+    def test_cache_evicts_least_recently_used(self):
+        cache = RateCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_balances_convert_to_home_currency(self):
+        self._expense(self.me, self.friend, Decimal("10"), "EUR", date(2025, 3, 1))  # +11.00 USD
+        self._expense(self.friend, self.me, Decimal("4"), "GBP", date(2025, 3, 1))   # -5.00 USD
+        res = self.client.get("/api/balances/")
+        self.assertEqual(res.data["currency"], "USD")
+        self.assertEqual(res.data["totals"]["net"], 6.0)
+
+        # 10 EUR stays 10 EUR; 5 USD converts at today's EUR rate.
+        Profile.objects.create(user=self.me, home_currency="EUR")
+        res = self.client.get("/api/summary/")
+        self.assertEqual(res.data["currency"], "EUR")
+        self.assertEqual(res.data["total_owed_to_me"], 10.0)
+        self.assertEqual(res.data["total_owed_by_me"], round(5 / 1.2, 2))
+
+    def test_currency_defaults_follow_base_currency(self):
+        with self.settings(BASE_CURRENCY="EUR"):
+            exp = Expense.objects.create(description="x", amount=1, paid_by=self.me)
+            profile = Profile.objects.create(user=self.me)
+        self.assertEqual(exp.currency, "EUR")
+        self.assertEqual(profile.home_currency, "EUR")
+
+    def test_home_currency_can_be_read_and_set(self):
+        self.assertEqual(self.client.get("/api/me/").data["home_currency"], "USD")
+        res = self.client.patch("/api/me/", {"home_currency": "gbp"}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["home_currency"], "GBP")
+        self.assertEqual(self.client.get("/api/summary/").data["currency"], "GBP")
+        self.assertEqual(self.client.patch("/api/me/", {"home_currency": "CHF"}, format="json").status_code, 400)
+
+    def test_home_currency_with_only_recent_rates_converts_older_history(self):
+        ExchangeRate.objects.create(currency="CHF", effective_date=date.today(), rate=Decimal("1.1"))
+        self._expense(self.me, self.friend, Decimal("11"), "USD", date.today() - timedelta(days=30))
+        res = self.client.patch("/api/me/", {"home_currency": "CHF"}, format="json")
+        self.assertEqual(res.status_code, 200)
+        for params in ({}, {"currency": "CHF"}):
+            res = self.client.get("/api/summary/", params)
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res.data["total_owed_to_me"], 10.0)
+            self.assertEqual(self.client.get("/api/balances/", params).status_code, 200)
+
+    def test_balance_reads_need_only_the_display_rate(self):
+        self._expense(self.me, self.friend, Decimal("10"), "EUR", date(2025, 3, 1))
+        self._expense(self.me, self.friend, Decimal("10"), "GBP", date(2025, 7, 1))
+        rate_cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/balances/", {"currency": "EUR"})
+        rate_queries = [q for q in ctx.captured_queries if "api_exchangerate" in q["sql"]]
+        self.assertEqual(len(rate_queries), 1)
+
+    def test_loading_rates_reprices_expenses(self):
+        self._expense(self.me, self.friend, Decimal("10"), "EUR", date(2025, 3, 1))  # 11.00 USD
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "rates.csv"
+            path.write_text("currency,date,rate\nEUR,2025-02-01,1.5\n")
+            call_command("load_exchange_rates", str(path), stdout=StringIO())
+        self.assertEqual(Expense.objects.get().base_rate, Decimal("1.5"))
+        self.assertEqual(self.client.get("/api/summary/").data["total_owed_to_me"], 15.0)
+
+    def test_create_expense_in_currency(self):
+        body = {"description": "Hotel", "amount": "90", "currency": "eur",
+                "split_type": "equal", "splits": [{"user_id": self.me.id}, {"user_id": self.friend.id}]}
+        res = self.client.post("/api/expenses/", body, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data["currency"], "EUR")
+        body["currency"] = "CHF"
+        self.assertEqual(self.client.post("/api/expenses/", body, format="json").status_code, 400)
+
+    def test_create_expense_rejects_currency_with_only_future_rates(self):
+        ExchangeRate.objects.create(currency="CHF", effective_date=date(2100, 1, 1), rate=Decimal("1.1"))
+        body = {"description": "Hotel", "amount": "90", "currency": "CHF",
+                "split_type": "equal", "splits": [{"user_id": self.me.id}, {"user_id": self.friend.id}]}
+        res = self.client.post("/api/expenses/", body, format="json")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("no CHF exchange rate", res.data["error"])
+        self.assertFalse(Expense.objects.exists())
+        self.assertEqual(self.client.get("/api/summary/").status_code, 200)
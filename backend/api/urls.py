@@ -22,6 +22,8 @@ urlpatterns = [
     path("summary/", views.summary, name="summary"),
     path("recent-expenses/", views.recent_expenses, name="recent-expenses"),
     path("expenses/", views.expenses, name="expenses"),
+    path("expenses/search/", views.search_expenses, name="search-expenses"),
+    path("expenses/archive/", views.archived_expenses, name="archived-expenses"),
     path("balances/", views.balances, name="balances"),
 
     # -------------------------
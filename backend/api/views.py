@@ -1,31 +1,66 @@
+from datetime import date
 from decimal import Decimal
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.models import User
 from django.core.mail import send_mail
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum
 
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Expense, Split, Friendship, Group
+from .models import (
+    ArchivedExpense,
+    BalanceSnapshot,
+    Expense,
+    Split,
+    Friendship,
+    Group,
+    Profile,
+)
 from .serializers import (
     UserSerializer,
+    ArchivedExpenseSerializer,
     ExpenseSerializer,
     FriendshipSerializer,
     GroupSerializer,
 )
+from .fx import FxError, base_currency, convert_totals, normalize_currency, rates_for
+from .idempotency import idempotent
+from .search import SearchError, search_expense_ids
+from .splits import SplitError, allocate, from_cents, to_cents
 
 
 # -------------------------
 # User Endpoints
 # -------------------------
 
-@api_view(["GET"])
+@api_view(["GET", "PATCH"])
 @permission_classes([IsAuthenticated])
 def me(request):
-    """Return the logged-in user details."""
-    return Response(UserSerializer(request.user).data)
+    """
+    GET: the logged-in user's details and home currency.
+    PATCH: {"home_currency": "EUR"} sets the currency summary and balances
+    are converted into.
+    """
+    if request.method == "PATCH":
+        try:
+            code = normalize_currency(request.data.get("home_currency"))
+            # Balances reach the home currency at today's rate whatever their
+            # dates (see fx.convert_totals), so that is the only rate it needs.
+            rates_for({(code, date.today())})
+        except FxError as e:
+            return Response({"error": str(e)}, status=400)
+        Profile.objects.update_or_create(user=request.user, defaults={"home_currency": code})
+
+    home = (
+        Profile.objects.filter(user=request.user)
+        .values_list("home_currency", flat=True)
+        .first()
+    )
+    return Response({**UserSerializer(request.user).data, "home_currency": home or base_currency()})
 
 
 @api_view(["GET"])
@@ -40,32 +75,128 @@ def users(request):
 # Summary & Balances
 # -------------------------
 
+def _currency_sums(target, prefix=""):
+    """
+    Sum() terms splitting `amount` into what is already in target and what
+    is in other currencies, the latter valued in BASE_CURRENCY through the
+    expense's base_rate. prefix is the path from the queried model to Expense.
+    """
+    in_target = Q(**{f"{prefix}currency": target})
+    return {
+        "in_target": Sum("amount", filter=in_target),
+        "in_base": Sum(
+            F("amount") * F(f"{prefix}base_rate"),
+            filter=~in_target,
+            output_field=DecimalField(max_digits=30, decimal_places=10),
+        ),
+    }
+
+
+def _split_totals(user, target, per_counterparty=True):
+    """
+    Yield (direction, counterparty_id, amount, currency) for live splits
+    between the user and someone else, where direction is "to_me" or "by_me"
+    and currency is target or BASE_CURRENCY. Conversion happens inside the
+    SUM, so each counterparty (or, with per_counterparty=False, each
+    direction, counterparty None) costs at most two rows whatever the mix of
+    currencies and dates.
+    Two index-backed queries instead of one OR across the join, which SQLite
+    can only answer with a full scan.
+    """
+    base = base_currency()
+    sums = _currency_sums(target, prefix="expense__")
+    owed_to_user = Split.objects.filter(expense__paid_by=user).exclude(user=user)
+    owed_by_user = Split.objects.filter(user=user).exclude(expense__paid_by=user)
+    for direction, qs, other in (
+        ("to_me", owed_to_user, "user_id"),
+        ("by_me", owed_by_user, "expense__paid_by_id"),
+    ):
+        if per_counterparty:
+            rows = qs.values(other).annotate(**sums).order_by().values_list(other, *sums)
+        else:
+            totals = qs.aggregate(**sums)
+            rows = [(None, totals["in_target"], totals["in_base"])]
+        for counterparty, in_target, in_base in rows:
+            if in_target:
+                yield direction, counterparty, in_target, target
+            if in_base:
+                yield direction, counterparty, in_base, base
+
+
+def _snapshots_for(user, target, paid=False):
+    """
+    Yield (creditor_id, debtor_id, amount, currency) carried forward from
+    archived expenses. A snapshot already in target keeps its own amount;
+    any other is given as its base_amount in BASE_CURRENCY.
+    With paid=True, yield instead the user's own (user, user) rows: what
+    they paid for archived expenses, for summary's fallback.
+    """
+    base = base_currency()
+    if paid:
+        snapshots = BalanceSnapshot.objects.filter(creditor=user, debtor=user)
+    else:
+        snapshots = BalanceSnapshot.objects.filter(Q(creditor=user) | Q(debtor=user)).exclude(
+            creditor=F("debtor")
+        )
+    snapshots = snapshots.exclude(amount=0).values_list(
+        "creditor_id", "debtor_id", "amount", "base_amount", "currency"
+    )
+    for creditor_id, debtor_id, amount, base_amount, currency in snapshots:
+        if currency == target:
+            yield creditor_id, debtor_id, amount, currency
+        else:
+            yield creditor_id, debtor_id, base_amount, base
+
+
+def _display_currency(request):
+    """?currency=XXX, else the user's home currency, else BASE_CURRENCY."""
+    code = request.query_params.get("currency")
+    if not code:
+        code = (
+            Profile.objects.filter(user=request.user)
+            .values_list("home_currency", flat=True)
+            .first()
+        )
+    return normalize_currency(code or base_currency())
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def summary(request):
     """
-    Global summary for the logged-in user.
-    Uses splits when available; falls back to naive totals.
+    Global summary for the logged-in user, converted into their home currency
+    (or ?currency=).
+    Uses splits when available; falls back to the total of expenses the
+    user paid.
     """
     user = request.user
-    owed_by_me = Decimal("0")
-    owed_to_me = Decimal("0")
-
-    for s in Split.objects.select_related("expense", "expense__paid_by", "user"):
-        payer, ower, amt = s.expense.paid_by, s.user, Decimal(s.amount)
-        if payer.id == user.id and ower.id != user.id:
-            owed_to_me += amt
-        elif ower.id == user.id and payer.id != user.id:
-            owed_by_me += amt
-
-    if owed_by_me == 0 and owed_to_me == 0:
-        for exp in Expense.objects.all():
-            if exp.paid_by_id == user.id:
-                owed_to_me += Decimal(exp.amount)
-            else:
-                owed_by_me += Decimal(exp.amount)
-
+    try:
+        target = _display_currency(request)
+        rows = [
+            (direction, amt, currency, None)
+            for direction, _, amt, currency in _split_totals(user, target, per_counterparty=False)
+        ]
+        for creditor_id, _, amt, currency in _snapshots_for(user, target):
+            rows.append(("to_me" if creditor_id == user.id else "by_me", amt, currency, None))
+
+        totals = convert_totals(rows, target)
+        if totals["to_me"] == 0 and totals["by_me"] == 0:
+            # Only what the user paid: totalling every expense in the table
+            # would be a full scan on each dashboard load.
+            naive = Expense.objects.filter(paid_by=user).aggregate(**_currency_sums(target))
+            rows = [
+                ("to_me", naive["in_target"] or 0, target, None),
+                ("to_me", naive["in_base"] or 0, base_currency(), None),
+            ]
+            for _, _, amt, currency in _snapshots_for(user, target, paid=True):
+                rows.append(("to_me", amt, currency, None))
+            totals = convert_totals(rows, target)
+    except FxError as e:
+        return Response({"error": str(e)}, status=400)
+
+    owed_to_me, owed_by_me = totals["to_me"], totals["by_me"]
     return Response({
+        "currency": target,
         "total_owed_by_me": round(float(owed_by_me), 2),
         "total_owed_to_me": round(float(owed_to_me), 2),
         "net_balance": round(float(owed_to_me - owed_by_me), 2),
@@ -76,27 +207,34 @@ def summary(request):
 @permission_classes([IsAuthenticated])
 def balances(request):
     """
-    Per-friend balances using splits.
+    Per-friend balances using splits, converted into the user's home currency
+    (or ?currency=).
     Positive => they owe you, Negative => you owe them.
     """
     me = request.user
-    net_by_user: dict[int, Decimal] = {}
+    try:
+        target = _display_currency(request)
+        rows = [
+            (other_id, amt if direction == "to_me" else -amt, currency, None)
+            for direction, other_id, amt, currency in _split_totals(me, target)
+        ]
+        for creditor_id, debtor_id, amt, currency in _snapshots_for(me, target):
+            if creditor_id == me.id:
+                rows.append((debtor_id, amt, currency, None))
+            else:
+                rows.append((creditor_id, -amt, currency, None))
 
-    qs = Split.objects.select_related("expense", "expense__paid_by", "user")
-    for s in qs:
-        payer, ower, amt = s.expense.paid_by, s.user, Decimal(s.amount)
-        if payer.id == me.id and ower.id != me.id:
-            net_by_user[ower.id] = net_by_user.get(ower.id, Decimal("0")) + amt
-        elif ower.id == me.id and payer.id != me.id:
-            net_by_user[payer.id] = net_by_user.get(payer.id, Decimal("0")) - amt
+        net_by_user = convert_totals(rows, target)
+    except FxError as e:
+        return Response({"error": str(e)}, status=400)
 
     you_are_owed, you_owe = [], []
     total_to_me, total_by_me = Decimal("0"), Decimal("0")
 
+    users_by_id = User.objects.in_bulk(list(net_by_user))
     for uid, net in net_by_user.items():
-        try:
-            u = User.objects.get(pk=uid)
-        except User.DoesNotExist:
+        u = users_by_id.get(uid)
+        if u is None:
             continue
         entry = {"user": UserSerializer(u).data, "amount": round(float(abs(net)), 2)}
         if net > 0:
@@ -110,6 +248,7 @@ def balances(request):
     you_owe.sort(key=lambda x: -x["amount"])
 
     return Response({
+        "currency": target,
         "you_are_owed": you_are_owed,
         "you_owe": you_owe,
         "totals": {
@@ -128,53 +267,153 @@ def balances(request):
 @permission_classes([IsAuthenticated])
 def recent_expenses(request):
     """Return recent expenses (paged/limited)."""
-    expenses = Expense.objects.order_by("-date")[:20]
+    expenses = Expense.objects.order_by("-date", "-id")[:20]
     return Response({"results": ExpenseSerializer(expenses, many=True).data})
 
 
 @csrf_exempt
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@idempotent
 def expenses(request):
     """
     GET: list expenses.
     POST: create an expense with optional splits.
+    {
+      "description": "Dinner",
+      "amount": 90,
+      "currency": "EUR",          (optional, defaults to BASE_CURRENCY)
+      "split_type": "equal" | "percentage" | "shares" | "exact",
+      "splits": [{"user_id": 2}, {"user_id": 3, "shares": 2}, ...]
+    }
+    Split amounts are computed server-side (see api/splits.py) and always
+    add up to the expense amount.
     """
     if request.method == "GET":
-        qs = Expense.objects.order_by("-date")[:50]
+        qs = Expense.objects.order_by("-date", "-id")[:50]
         return Response({"results": ExpenseSerializer(qs, many=True).data})
 
     desc = (request.data.get("description") or "").strip()
     amount = request.data.get("amount", 0)
     paid_by_id = request.data.get("paid_by") or request.data.get("paid_by_id")
-    splits_data = request.data.get("splits", [])
+    currency = request.data.get("currency") or base_currency()
+    split_type = request.data.get("split_type") or "exact"
+    splits_data = request.data.get("splits") or []
 
     if not desc:
         return Response({"error": "description required"}, status=400)
 
     try:
-        amount = float(amount)
-    except (TypeError, ValueError):
-        return Response({"error": "amount must be a number"}, status=400)
+        amount = from_cents(to_cents(amount))
+    except SplitError as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        # Expense.date is today, so the rate in effect today becomes its
+        # base_rate; refuse currencies that don't have one yet.
+        currency = normalize_currency(currency)
+        today = date.today()
+        base_rate = rates_for({(currency, today)})[(currency, today)]
+    except FxError as e:
+        return Response({"error": str(e)}, status=400)
+
+    try:
+        allocations = allocate(amount, split_type, splits_data) if splits_data else []
+    except SplitError as e:
+        return Response({"error": f"invalid split: {e}"}, status=400)
 
     if paid_by_id:
         try:
-            payer = User.objects.get(pk=int(paid_by_id))
-        except (User.DoesNotExist, ValueError):
+            paid_by_id = int(paid_by_id)
+        except (TypeError, ValueError):
             return Response({"error": "paid_by must be valid"}, status=400)
     else:
-        payer = request.user
+        paid_by_id = request.user.id
+
+    # One query validates the payer and every participant together.
+    wanted = {uid for uid, _ in allocations} | {paid_by_id}
+    found = set(User.objects.filter(pk__in=wanted).values_list("pk", flat=True))
+    if paid_by_id not in found:
+        return Response({"error": "paid_by must be valid"}, status=400)
+    missing = sorted(wanted - found)
+    if missing:
+        return Response({"error": f"invalid split: unknown users {missing}"}, status=400)
+
+    with transaction.atomic():
+        exp = Expense.objects.create(
+            description=desc, amount=amount, currency=currency, base_rate=base_rate,
+            paid_by_id=paid_by_id,
+        )
+        Split.objects.bulk_create(
+            [Split(expense=exp, user_id=uid, amount=amt) for uid, amt in allocations]
+        )
 
-    exp = Expense.objects.create(description=desc, amount=amount, paid_by=payer)
+    exp = (
+        Expense.objects.select_related("paid_by")
+        .prefetch_related("splits__user")
+        .get(pk=exp.pk)
+    )
+    return Response(ExpenseSerializer(exp).data, status=201)
 
-    for split in splits_data:
-        try:
-            split_user = User.objects.get(pk=int(split["user"]))
-            Split.objects.create(expense=exp, user=split_user, amount=float(split["amount"]))
-        except Exception as e:
-            return Response({"error": f"invalid split: {e}"}, status=400)
 
-    return Response(ExpenseSerializer(exp).data, status=201)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def search_expenses(request):
+    """
+    Full-text search over expense descriptions, limited to expenses the user
+    paid or has a split in. Best matches first.
+    GET /api/expenses/search/?q=dinner&limit=20&cursor=<next_cursor>
+    """
+    try:
+        limit = int(request.query_params.get("limit", 20))
+    except ValueError:
+        return Response({"error": "limit must be an integer"}, status=400)
+
+    try:
+        ids, next_cursor = search_expense_ids(
+            request.user.id,
+            request.query_params.get("q", ""),
+            limit=limit,
+            cursor=request.query_params.get("cursor"),
+        )
+    except SearchError as e:
+        return Response({"error": str(e)}, status=400)
+
+    by_id = Expense.objects.select_related("paid_by").prefetch_related("splits__user").in_bulk(ids)
+    results = [by_id[i] for i in ids if i in by_id]
+    return Response({
+        "results": ExpenseSerializer(results, many=True).data,
+        "next_cursor": next_cursor,
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def archived_expenses(request):
+    """
+    Archived history the user paid or has a split in, newest first.
+    This reads the cold archive tables and is deliberately not indexed for
+    speed. GET /api/expenses/archive/?limit=20&before_id=<last id>
+    """
+    try:
+        limit = max(1, min(int(request.query_params.get("limit", 20)), 100))
+        before_id = request.query_params.get("before_id")
+        before_id = int(before_id) if before_id else None
+    except ValueError:
+        return Response({"error": "limit and before_id must be integers"}, status=400)
+
+    qs = ArchivedExpense.objects.filter(
+        Q(paid_by=request.user) | Q(splits__user=request.user)
+    ).distinct()
+    if before_id is not None:
+        qs = qs.filter(id__lt=before_id)
+    page = list(
+        qs.select_related("paid_by").prefetch_related("splits__user").order_by("-id")[:limit]
+    )
+    return Response({
+        "results": ArchivedExpenseSerializer(page, many=True).data,
+        "next_before_id": page[-1].id if len(page) == limit else None,
+    })
 
 
 # -------------------------
@@ -183,6 +422,7 @@ def expenses(request):
 
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
+@idempotent
 def add_friend(request):
     """Send a friend request or invite by email."""
     email = request.data.get("email")
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -67,6 +68,23 @@ REST_FRAMEWORK = {
 }
 
 
+# How long a stored Idempotency-Key response is replayed before it can be purged
+# (manage.py expire_idempotency_keys).
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+
+# Exchange rates (api.ExchangeRate) are quoted against BASE_CURRENCY, which is
+# also the default expense and home currency. Looked-up rates are kept in an
+# in-process LRU cache of FX_RATE_CACHE_SIZE entries for FX_RATE_CACHE_TTL seconds.
+# The cache is per process: load_exchange_rates re-prices stored expenses at
+# once but clears only its own cache, so running web workers may use the old
+# rate for new expenses and for converting into a display currency for up to
+# FX_RATE_CACHE_TTL seconds (or until restarted).
+BASE_CURRENCY = "USD"
+FX_RATE_CACHE_SIZE = 4096
+FX_RATE_CACHE_TTL = 3600
+
+
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOWED_ORIGINS = [
 'http://localhost:5173', # Vite default
@@ -99,6 +117,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than the default shared-cache in-memory database, so
+        # concurrent tests see SQLite's real locking (writers wait for each
+        # other instead of failing with "database table is locked").
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 